@@ -1,6 +1,21 @@
+import os
 from google.adk.agents import LlmAgent
+from google.adk.tools import FunctionTool
 from .agents import nugen_agent 
 from .agents import well_agent 
+from .agents.nugenomics import nugenagent
+from .agents.wellness import wellagent
+from .fanout import ask_both_agents
+from .replay import install_from_env
+
+# Fan-out mode: ambiguous questions run both sub-agents concurrently.
+FANOUT_ENABLED = os.getenv("ROUTER_FANOUT", "1") != "0"
+
+FANOUT_INSTRUCTION = (
+    "→ If the question could belong to either agent (for example what a DNA report says about "
+    "sleep, diet or fitness), call 'ask_both_agents' once instead of calling both sub-agents, "
+    "and present the answer it returns together with the agent that produced it.\n"
+)
 
 router_agent = LlmAgent(
     name="nugenomics_hybrid_agent",
@@ -15,17 +30,21 @@ router_agent = LlmAgent(
         "→ If the question is related to Nugenomics, reports, counselling, DNA tests, "
         "rescheduling, or anything about company processes, route it to the 'nugen_agent'.\n"
         "→ If the question is about genetics, DNA, health, or wellness, route it to the 'wellagent'.\n"
+        + (FANOUT_INSTRUCTION if FANOUT_ENABLED else "") +
         "→ If the question is unrelated to these topics, respond with: "
         "'I can only answer questions about genetics, wellness, or Nugenomics company topics.'\n\n"
         "When you respond, clearly specify which sub-agent handled the question and then show the result. "
         "Start your response from a new line after introducing the agent."
     ),
-    tools=[nugen_agent, well_agent],
+    tools=[nugen_agent, well_agent] + ([FunctionTool(ask_both_agents)] if FANOUT_ENABLED else []),
 )
 
 
 root_agent = router_agent
 
+# LLM_REPLAY_MODE=record|replay wraps every model call for offline replay.
+recorder = install_from_env([router_agent, nugenagent, wellagent])
+
 import asyncio
 from google.adk.runners import Runner
 from google.adk.sessions.in_memory_session_service import InMemorySessionService
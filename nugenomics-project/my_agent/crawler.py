@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import xml.etree.ElementTree as ET
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .faq_service import FAQ_URL, CACHE_DIR, reindex_pages
+
+CRAWL_URLS = [u.strip() for u in os.getenv("CRAWL_URLS", FAQ_URL).split(",") if u.strip()]
+CRAWL_SITEMAP = os.getenv("CRAWL_SITEMAP")
+MANIFEST_PATH = os.path.join(CACHE_DIR, "crawl_manifest.json")
+MAX_CONCURRENCY = 8
+PER_HOST_DELAY = 1.0
+TIMEOUT = 15
+USER_AGENT = "nugenomics-faq-cache/1.0"
+
+_SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+
+def _load_manifest(path):
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {}
+
+
+def _save_manifest(path, manifest):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+class _HostGate:
+    """Spaces out requests to the same host by at least `delay` seconds.
+
+    Each caller reserves the next free slot for its host and sleeps until then
+    without holding any lock or concurrency slot, so a slow host never blocks
+    requests to other hosts.
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self._next = {}
+
+    async def wait(self, url):
+        host = urlparse(url).netloc
+        now = time.monotonic()
+        slot = max(now, self._next.get(host, 0.0))
+        self._next[host] = slot + self.delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def _fetch(session, url, sem, gate, etag=None):
+    """GET one page. Returns (status, text, etag); text is None on 304 or error, status None on network errors."""
+    headers = {"If-None-Match": etag} if etag else {}
+    await gate.wait(url)
+    async with sem:
+        try:
+            async with session.get(url, headers=headers) as resp:
+                if resp.status == 304:
+                    return 304, None, etag
+                if resp.status >= 400:
+                    print(f"❌ Error fetching {url}: HTTP {resp.status}")
+                    return resp.status, None, None
+                return resp.status, await resp.text(), resp.headers.get("ETag")
+        except Exception as e:
+            print(f"❌ Error fetching {url}: {e}")
+            return None, None, None
+
+
+async def expand_sitemap(session, sitemap_url, sem, gate):
+    """Return page URLs listed in a sitemap, following nested sitemap indexes; None if it could not be read."""
+    status, text, _ = await _fetch(session, sitemap_url, sem, gate)
+    if not text:
+        return None
+    try:
+        root = ET.fromstring(text)
+    except ET.ParseError as e:
+        print(f"❌ Invalid sitemap {sitemap_url}: {e}")
+        return None
+
+    locs = [el.text.strip() for el in root.iter(_SITEMAP_NS + "loc") if el.text]
+    if root.tag == _SITEMAP_NS + "sitemapindex":
+        nested = await asyncio.gather(*(expand_sitemap(session, u, sem, gate) for u in locs))
+        if any(urls is None for urls in nested):
+            return None
+        return [u for urls in nested for u in urls]
+    return locs
+
+
+async def crawl(urls=None, sitemap=None, manifest_path=MANIFEST_PATH,
+                concurrency=MAX_CONCURRENCY, per_host_delay=PER_HOST_DELAY):
+    """Fetch every URL (plus any listed in `sitemap`) and work out what changed.
+
+    Returns ``(changed, removed, manifest)``: ``changed`` maps URL to HTML for
+    pages whose SHA-256 differs from the manifest (a 304 for the stored ETag
+    counts as unchanged), ``removed`` lists pages that now answer 404/410 or are
+    no longer configured, and ``manifest`` is the updated manifest. The
+    manifest is not written here; save it once the pages are re-indexed.
+    """
+    urls = list(urls if urls is not None else CRAWL_URLS)
+    manifest = _load_manifest(manifest_path)
+    sem = asyncio.Semaphore(concurrency)
+    gate = _HostGate(per_host_delay)
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    complete = True
+
+    async with aiohttp.ClientSession(timeout=timeout, headers={"User-Agent": USER_AGENT}) as session:
+        if sitemap:
+            listed = await expand_sitemap(session, sitemap, sem, gate)
+            # Without a readable sitemap we cannot tell which pages were dropped.
+            complete = listed is not None
+            urls.extend(listed or [])
+        urls = list(dict.fromkeys(urls))
+
+        async def visit(url):
+            entry = manifest.get(url, {})
+            status, text, etag = await _fetch(session, url, sem, gate, entry.get("etag"))
+            if status in (404, 410):
+                return url, None, True
+            if text is None:
+                return url, None, False
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            changed = digest != entry.get("hash")
+            manifest[url] = {"hash": digest, "etag": etag, "fetched_at": time.time()}
+            return url, text if changed else None, False
+
+        results = await asyncio.gather(*(visit(u) for u in urls))
+
+    changed = {url: text for url, text, _ in results if text is not None}
+    removed = [url for url, _, gone in results if gone]
+    if complete:
+        removed.extend(u for u in manifest if u not in urls)
+    for url in removed:
+        manifest.pop(url, None)
+    return changed, removed, manifest
+
+
+def crawl_and_reindex(urls=None, sitemap=CRAWL_SITEMAP, manifest_path=MANIFEST_PATH, **kwargs):
+    """Crawl the configured sources and re-index only the pages that changed or disappeared."""
+    changed, removed, manifest = asyncio.run(crawl(urls, sitemap, manifest_path, **kwargs))
+    index = reindex_pages(changed, removed)
+    # Only record the new hashes once the index really reflects them.
+    _save_manifest(manifest_path, manifest)
+    return {"changed": sorted(changed), "removed": sorted(removed), "entries": len(index)}
+
+
+if __name__ == "__main__":
+    summary = crawl_and_reindex()
+    print(f"✅ Re-indexed {len(summary['changed'])} changed page(s), removed {len(summary['removed'])}; "
+          f"{summary['entries']} FAQ entries total")
+    for url in summary["changed"]:
+        print(f"   • {url}")
+    for url in summary["removed"]:
+        print(f"   ✗ {url}")
@@ -0,0 +1,173 @@
+import os
+import time
+import asyncio
+from collections import Counter
+from threading import Lock
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from .agents.nugenomics import nugenagent
+from .agents.wellness import wellagent
+
+FANOUT_DEADLINE = 30.0
+# How long to keep waiting for the preferred (FAQ-grounded) agent once the
+# other one has answered; wellagent nearly always finishes first.
+FANOUT_GRACE = float(os.getenv("FANOUT_GRACE_SECONDS", "2.0"))
+# Shadow mode lets the losing agent run to completion (delaying the reply) so
+# fanout_stats() can compare against measured, not estimated, sequential time.
+FANOUT_SHADOW = os.getenv("FANOUT_SHADOW") == "1"
+USER_ID = "fanout_user"
+
+# Answers containing these are refusals or "not in the FAQ" replies, so they
+# only win if nothing better arrives before the deadline.
+_INADEQUATE_MARKERS = (
+    "could not be found",
+    "not available in the faq",
+    "can only answer",
+)
+
+_stats_lock = Lock()
+_stats = {
+    "runs": 0,
+    "wall_seconds": 0.0,
+    "wins": Counter(),
+    "measured_runs": 0,
+    "measured_wall_seconds": 0.0,
+    "measured_sequential_seconds": 0.0,
+    "agent_seconds": Counter(),
+}
+
+
+def _adequate(text):
+    text = (text or "").strip().lower()
+    return bool(text) and not any(m in text for m in _INADEQUATE_MARKERS)
+
+
+async def _run_agent(agent, question):
+    """Run one sub-agent on a fresh session; returns (final text, seconds)."""
+    start = time.perf_counter()
+    session_service = InMemorySessionService()
+    runner = Runner(agent=agent, app_name=agent.name, session_service=session_service)
+    session = await session_service.create_session(app_name=agent.name, user_id=USER_ID)
+    content = types.Content(role="user", parts=[types.Part(text=question)])
+
+    text = ""
+    async for event in runner.run_async(user_id=USER_ID, session_id=session.id, new_message=content):
+        if event.is_final_response() and event.content and event.content.parts:
+            text += "".join(p.text for p in event.content.parts if p.text)
+    return text, time.perf_counter() - start
+
+
+async def _collect(tasks, pending, finished, timeout):
+    # Wait for the next completions and move their results into `finished`.
+    done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    for task in done:
+        name = tasks[task]
+        try:
+            finished[name] = task.result()
+        except Exception as e:
+            print(f"❌ Fan-out agent {name} failed: {e}")
+    return pending
+
+
+def _pick(finished, preferred):
+    adequate = [name for name, (text, _) in finished.items() if _adequate(text)]
+    if preferred in adequate:
+        return preferred
+    return adequate[0] if adequate else None
+
+
+async def fan_out(question, agents, deadline=FANOUT_DEADLINE, preferred=None,
+                  grace=FANOUT_GRACE, shadow=FANOUT_SHADOW):
+    """Run `agents` concurrently and return the best adequate answer.
+
+    An adequate answer from `preferred` wins outright. An adequate answer from
+    any other agent wins unless `preferred` gives one within `grace` seconds.
+    If none is adequate by the deadline, the first non-empty answer is used.
+    The losing agents are cancelled, or in `shadow` mode left to finish so
+    their real run time is recorded.
+    """
+    start = time.perf_counter()
+    tasks = {asyncio.create_task(_run_agent(agent, question)): agent.name for agent in agents}
+    pending = set(tasks)
+    finished = {}
+    stop_at = start + deadline
+
+    in_grace = False
+    while pending:
+        if _pick(finished, preferred) is not None:
+            if not any(tasks[task] == preferred for task in pending):
+                break
+            if not in_grace:
+                stop_at = min(stop_at, time.perf_counter() + grace)
+                in_grace = True
+        remaining = stop_at - time.perf_counter()
+        if remaining <= 0:
+            break
+        pending = await _collect(tasks, pending, finished, remaining)
+    winner = _pick(finished, preferred)
+    if winner is None:
+        winner = next((name for name, (text, _) in finished.items() if text.strip()), None)
+    answer = finished[winner][0] if winner else ""
+    wall = time.perf_counter() - start
+
+    if shadow:
+        while pending and time.perf_counter() < start + deadline:
+            pending = await _collect(tasks, pending, finished, start + deadline - time.perf_counter())
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    measured = shadow and len(finished) == len(tasks)
+    with _stats_lock:
+        _stats["runs"] += 1
+        _stats["wall_seconds"] += wall
+        _stats["wins"][winner or "none"] += 1
+        if measured:
+            _stats["measured_runs"] += 1
+            _stats["measured_wall_seconds"] += wall
+            _stats["measured_sequential_seconds"] += sum(elapsed for _, elapsed in finished.values())
+            for name, (_, elapsed) in finished.items():
+                _stats["agent_seconds"][name] += elapsed
+    timings = ", ".join(f"{name} {elapsed:.2f}s" for name, (_, elapsed) in finished.items())
+    print(f"⚡ Fan-out: {winner or 'no answer'} chosen after {wall:.2f}s ({timings or 'no agent finished'})")
+
+    return {
+        "agent": winner,
+        "answer": answer,
+        "seconds": round(wall, 3),
+        "agent_seconds": {name: round(elapsed, 3) for name, (_, elapsed) in finished.items()},
+    }
+
+
+def fanout_stats():
+    """Cumulative fan-out latency and winners.
+
+    The comparison with running the agents one after the other only covers
+    shadow-mode runs, where every agent's run time was actually measured.
+    Compare against single-route runs recorded with my_agent.replay to see
+    what fan-out costs over routing to one agent.
+    """
+    with _stats_lock:
+        stats = dict(_stats, wins=dict(_stats["wins"]), agent_seconds=dict(_stats["agent_seconds"]))
+    runs = stats["measured_runs"]
+    if runs:
+        stats["saved_seconds"] = stats["measured_sequential_seconds"] - stats["measured_wall_seconds"]
+        stats["mean_agent_seconds"] = {name: s / runs for name, s in stats["agent_seconds"].items()}
+    return stats
+
+
+async def ask_both_agents(question: str) -> dict:
+    """Ask the NuGenomics FAQ agent and the genetic wellness agent at the same time.
+
+    Use this for questions that could belong to either agent, for example what a
+    DNA report says about sleep, diet or fitness. The FAQ-grounded NuGenomics
+    answer is preferred when it arrives shortly after the other. Returns the
+    name of the agent whose answer was used and that answer.
+    """
+    result = await fan_out(question, [nugenagent, wellagent], preferred=nugenagent.name)
+    if not result["agent"]:
+        return {"agent": None, "answer": "Neither agent could answer this question in time."}
+    return {"agent": result["agent"], "answer": result["answer"]}
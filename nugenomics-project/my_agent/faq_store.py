@@ -0,0 +1,141 @@
+from array import array
+
+_FIELDS = ("id", "question", "answer", "url")
+
+
+class FaqRecord:
+    """Read-only view of one entry in a FaqStore; supports item["field"] and item.get()."""
+
+    __slots__ = ("_store", "_pos")
+
+    def __init__(self, store, pos):
+        self._store = store
+        self._pos = pos
+
+    def __getitem__(self, key):
+        if key not in _FIELDS:
+            raise KeyError(key)
+        return getattr(self._store, key)(self._pos)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return _FIELDS
+
+    def to_dict(self):
+        return {key: self[key] for key in _FIELDS}
+
+
+class FaqStore:
+    """Column-oriented FAQ storage.
+
+    Ids and URL references are packed arrays, each distinct URL is stored once,
+    and questions and answers each live in one UTF-8 buffer addressed by
+    offsets and decoded only when asked for. Indexing returns a FaqRecord,
+    so code written against the old list of dicts keeps working.
+    """
+
+    def __init__(self, items=()):
+        self._ids = array("q")
+        self._questions = bytearray()
+        self._question_offsets = array("Q", [0])
+        self._url_ids = array("I")
+        self._urls = []
+        self._url_lookup = {}
+        self._answers = bytearray()
+        self._answer_offsets = array("Q", [0])
+        for item in items:
+            self.append(item)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, pos):
+        if pos < 0:
+            pos += len(self)
+        if not 0 <= pos < len(self):
+            raise IndexError("FaqStore index out of range")
+        return FaqRecord(self, pos)
+
+    def __iter__(self):
+        for pos in range(len(self)):
+            yield FaqRecord(self, pos)
+
+    def append(self, item):
+        self._ids.append(int(item.get("id", len(self))))
+        self._questions += (item.get("question") or "").encode("utf-8")
+        self._question_offsets.append(len(self._questions))
+
+        url = item.get("url") or ""
+        url_id = self._url_lookup.get(url)
+        if url_id is None:
+            url_id = self._url_lookup[url] = len(self._urls)
+            self._urls.append(url)
+        self._url_ids.append(url_id)
+
+        self._answers += (item.get("answer") or "").encode("utf-8")
+        self._answer_offsets.append(len(self._answers))
+
+    def id(self, pos):
+        return self._ids[pos]
+
+    def question(self, pos):
+        return self._questions[self._question_offsets[pos]:self._question_offsets[pos + 1]].decode("utf-8")
+
+    def answer(self, pos):
+        return self._answers[self._answer_offsets[pos]:self._answer_offsets[pos + 1]].decode("utf-8")
+
+    def url(self, pos):
+        return self._urls[self._url_ids[pos]]
+
+    def to_dicts(self):
+        return [record.to_dict() for record in self]
+
+
+if __name__ == "__main__":
+    import gc
+    import sys
+    import tracemalloc
+
+    from .ngram_index import TrigramIndex
+
+    URL = "https://www.nugenomics.in/faqs/"
+    ANSWER = ("Your saliva sample is analysed in our lab and combined with your blood markers "
+              "and lifestyle data to build a personalised nutrition and fitness plan, entry {i}.")
+
+    def entries(n):
+        # Concatenation builds a fresh URL string per entry, as json.load does.
+        for i in range(n):
+            yield {"id": i, "question": f"How is report {i} generated?",
+                   "answer": ANSWER.format(i=i), "url": URL[:-1] + URL[-1]}
+
+    def measure(build):
+        gc.collect()
+        tracemalloc.start()
+        obj = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del obj
+        gc.collect()
+        return current
+
+    def search_texts(store):
+        # What faq_service indexes for each entry.
+        return ((r["question"] + " " + r["answer"]).lower() for r in store)
+
+    # query_faq needs the trigram index as well as the store, so the total
+    # counts both.
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 1_000_000]
+    print(f"{'entries':>10}  {'list of dicts':>14}  {'FaqStore':>10}  {'index':>10}  {'total':>10}  ratio")
+    for n in sizes:
+        dicts = measure(lambda: list(entries(n)))
+        store = measure(lambda: FaqStore(entries(n)))
+        faqs = FaqStore(entries(n))
+        index = measure(lambda: TrigramIndex(search_texts(faqs)))
+        del faqs
+        print(f"{n:>10,}  {dicts / 2**20:11.1f} MB  {store / 2**20:7.1f} MB  {index / 2**20:7.1f} MB  "
+              f"{(store + index) / 2**20:7.1f} MB  {dicts / (store + index):5.1f}x")
@@ -0,0 +1,69 @@
+import re
+import heapq
+from array import array
+from collections import defaultdict
+
+N = 3
+CANDIDATES = 50
+MAX_DF = 0.5
+
+_non_alnum = re.compile(r"[^a-z0-9]+")
+
+
+def ngrams(text, n=N):
+    """Character n-grams of each word, padded so word starts and ends count too."""
+    grams = set()
+    for word in _non_alnum.sub(" ", (text or "").lower()).split():
+        padded = f" {word} "
+        if len(padded) < n:
+            grams.add(padded)
+            continue
+        for i in range(len(padded) - n + 1):
+            grams.add(padded[i:i + n])
+    return grams
+
+
+class TrigramIndex:
+    """Inverted index from character trigrams to document ids.
+
+    ``candidates`` only walks the postings of the query's trigrams, so the cost
+    depends on how many documents share those trigrams rather than on the size
+    of the corpus. Misspelled words still share most of their trigrams with the
+    correct spelling, which is what makes the lookup typo tolerant. Postings
+    are packed arrays of 32-bit ids, like the FaqStore columns, so the index
+    stays small next to the store it covers.
+    """
+
+    def __init__(self, texts=()):
+        self._postings = {}
+        self._count = 0
+        for text in texts:
+            self.add(text)
+
+    def __len__(self):
+        return self._count
+
+    def add(self, text):
+        doc_id = self._count
+        for gram in ngrams(text):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array("I")
+            postings.append(doc_id)
+        self._count += 1
+        return doc_id
+
+    def candidates(self, query, limit=CANDIDATES):
+        """Return up to `limit` doc ids sharing the most trigrams with `query`, best first."""
+        grams = [g for g in ngrams(query) if g in self._postings]
+        if not grams:
+            return []
+        # Trigrams found in most documents say little about relevance; skip them
+        # unless nothing more selective is available.
+        max_df = max(1, int(self._count * MAX_DF))
+        selective = [g for g in grams if len(self._postings[g]) <= max_df]
+        counts = defaultdict(int)
+        for gram in selective or grams:
+            for doc_id in self._postings[gram]:
+                counts[doc_id] += 1
+        return [doc_id for doc_id, _ in heapq.nlargest(limit, counts.items(), key=lambda kv: (kv[1], -kv[0]))]
@@ -0,0 +1,182 @@
+import os
+import sys
+import math
+import time
+import random
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(__file__), "data", "profiles"))
+PROFILE_HEADER = "X-Profile"
+ADMIN_HEADER = "X-Admin-Token"
+ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN")
+SAMPLE_INTERVAL = 0.005
+MAX_PROFILES_PER_MINUTE = 6
+
+_lock = threading.Lock()
+_recent = deque()
+_sample_rate = 0.0
+
+# Samplers currently running. While any are, Thread.start is patched; the
+# original is kept for good so a start racing with the restore still works.
+_active = []
+_ORIGINAL_START = threading.Thread.start
+
+
+def is_admin(headers):
+    return bool(ADMIN_TOKEN) and headers.get(ADMIN_HEADER) == ADMIN_TOKEN
+
+
+def set_sample_rate(rate):
+    """Admin toggle: profile this fraction (0..1) of requests, subject to the rate limit."""
+    global _sample_rate
+    try:
+        rate = float(rate)
+    except (TypeError, ValueError):
+        raise ValueError(f"sample_rate must be a number, got {rate!r}")
+    if not math.isfinite(rate):
+        raise ValueError(f"sample_rate must be finite, got {rate!r}")
+    _sample_rate = min(max(rate, 0.0), 1.0)
+
+
+def status():
+    with _lock:
+        window = _prune(time.monotonic())
+    return {
+        "sample_rate": _sample_rate,
+        "profiles_last_minute": window,
+        "max_profiles_per_minute": MAX_PROFILES_PER_MINUTE,
+        "output_dir": PROFILE_DIR,
+    }
+
+
+def _prune(now):
+    while _recent and now - _recent[0] > 60:
+        _recent.popleft()
+    return len(_recent)
+
+
+def should_profile(headers):
+    """True when this request should be profiled.
+
+    With no sample rate set and no profile header this is a float check and a
+    header lookup, so the profiler costs nothing while it is off.
+    """
+    requested = headers.get(PROFILE_HEADER)
+    if not requested and not _sample_rate:
+        return False
+    if requested:
+        # The header must carry the admin token so clients cannot trigger profiles.
+        if not ADMIN_TOKEN or requested != ADMIN_TOKEN:
+            return False
+    elif random.random() >= _sample_rate:
+        return False
+    with _lock:
+        now = time.monotonic()
+        if _prune(now) >= MAX_PROFILES_PER_MINUTE:
+            return False
+        _recent.append(now)
+    return True
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    filename = os.path.basename(code.co_filename)
+    return f"{name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _collapse(thread_name, frame):
+    stack = []
+    while frame is not None:
+        stack.append(_frame_name(frame))
+        frame = frame.f_back
+    stack.append(thread_name.replace(";", ":"))
+    return ";".join(reversed(stack))
+
+
+def _tracking_start(thread):
+    """Thread.start replacement used while profiling: threads started from a
+    profiled thread join that profile, so other requests' threads never do."""
+    parent = threading.get_ident()
+    owners = [s for s in list(_active) if parent in s.threads]
+    _ORIGINAL_START(thread)
+    for sampler in owners:
+        sampler.threads.add(thread.ident)
+
+
+def _track(sampler):
+    with _lock:
+        if not _active:
+            threading.Thread.start = _tracking_start
+        _active.append(sampler)
+
+
+def _untrack(sampler):
+    with _lock:
+        _active.remove(sampler)
+        if not _active:
+            threading.Thread.start = _ORIGINAL_START
+
+
+class _Sampler(threading.Thread):
+    """Samples the stacks of the request thread and of the threads it starts.
+
+    asyncio tasks run on the request thread's event loop, and the loop's
+    executor threads (tool calls, blocking I/O) are started from that thread,
+    so both show up in the profile. Threads of concurrent requests are started
+    by the server, not by this request, and are left out.
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        self.threads = {thread_id}
+        self.counts = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid in self.threads:
+                    self.counts[_collapse(names.get(tid, str(tid)), frame)] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _write(label, counts):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(PROFILE_DIR, f"{stamp}-{label}-{threading.get_ident()}.collapsed")
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in counts.most_common():
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+@contextmanager
+def profile_request(label="request", interval=SAMPLE_INTERVAL):
+    """Sample the current thread until the block exits and save collapsed stacks.
+
+    The yielded dict gets ``path`` (the .collapsed file, usable with
+    flamegraph.pl or speedscope), ``samples`` and ``seconds`` on exit.
+    """
+    result = {"path": None, "samples": 0, "seconds": 0.0}
+    sampler = _Sampler(threading.get_ident(), interval)
+    start = time.perf_counter()
+    sampler.start()
+    _track(sampler)
+    try:
+        yield result
+    finally:
+        _untrack(sampler)
+        sampler.stop()
+        result["seconds"] = time.perf_counter() - start
+        result["samples"] = sampler.samples
+        result["path"] = _write(label, sampler.counts)
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+from collections import Counter, defaultdict, deque
+from threading import Lock
+
+from google.adk.models import LlmResponse
+
+REPLAY_MODE = os.getenv("LLM_REPLAY_MODE")
+REPLAY_PATH = os.getenv("LLM_REPLAY_PATH", os.path.join(os.path.dirname(__file__), "data", "replay", "fixtures.jsonl"))
+# Multiplier applied to recorded model latency in replay mode; 0 replays instantly.
+REPLAY_LATENCY_SCALE = float(os.getenv("LLM_REPLAY_LATENCY_SCALE", "0"))
+
+
+def _strip_ids(value):
+    # Function call ids are random per run, so they must not affect the key.
+    if isinstance(value, dict):
+        return {k: _strip_ids(v) for k, v in value.items() if k != "id"}
+    if isinstance(value, list):
+        return [_strip_ids(v) for v in value]
+    return value
+
+
+def request_key(agent_name, llm_request):
+    """Stable hash of everything that decides the model's answer.
+
+    This includes the full system instruction and every tool response, so a
+    prompt edit or a change in what the FAQ search returns makes the old
+    recordings miss; re-record the fixtures after such changes.
+    """
+    payload = {
+        "agent": agent_name,
+        "model": llm_request.model,
+        "system": str(llm_request.config.system_instruction) if llm_request.config else None,
+        "contents": _strip_ids([c.model_dump(mode="json", exclude_none=True) for c in llm_request.contents]),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ModelRecorder:
+    """Records model request/response pairs to a JSONL file, or replays them offline.
+
+    Installed as before/after model callbacks on each LlmAgent. In ``record``
+    mode every real response is appended to ``path`` with its latency. In
+    ``replay`` mode the before-model callback answers from the file, so the
+    model is never called; a request with no recording raises KeyError.
+    """
+
+    def __init__(self, mode, path=REPLAY_PATH, latency_scale=REPLAY_LATENCY_SCALE):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown replay mode: {mode!r} (expected 'record' or 'replay')")
+        self.mode = mode
+        self.path = path
+        self.latency_scale = latency_scale
+        self.stats = Counter()
+        self._lock = Lock()
+        self._pending = {}
+        self._fixtures = defaultdict(deque)
+        if mode == "replay":
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._fixtures[entry["key"]].append(entry)
+
+    def _count(self, llm_response, seconds):
+        usage = llm_response.usage_metadata
+        parts = llm_response.content.parts if llm_response.content and llm_response.content.parts else []
+        with self._lock:
+            self.stats["model_calls"] += 1
+            self.stats["tool_calls"] += sum(1 for p in parts if p.function_call)
+            self.stats["prompt_tokens"] += (usage.prompt_token_count or 0) if usage else 0
+            self.stats["output_tokens"] += (usage.candidates_token_count or 0) if usage else 0
+            self.stats["model_seconds"] += seconds
+
+    def reset_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            self.stats.clear()
+        return stats
+
+    async def before_model(self, callback_context, llm_request):
+        key = request_key(callback_context.agent_name, llm_request)
+        if self.mode == "record":
+            self._pending[(callback_context.invocation_id, callback_context.agent_name)] = (key, time.perf_counter())
+            return None
+
+        entries = self._fixtures.get(key)
+        if not entries:
+            with self._lock:
+                self.stats["replay_misses"] += 1
+            raise KeyError(f"No recorded model response for agent {callback_context.agent_name} (key {key[:12]})")
+        # Consume recordings in order, but keep the last one so repeated runs still replay.
+        entry = entries.popleft() if len(entries) > 1 else entries[0]
+        response = LlmResponse.model_validate(entry["response"])
+        self._count(response, entry["seconds"])
+        if self.latency_scale:
+            await asyncio.sleep(entry["seconds"] * self.latency_scale)
+        return response
+
+    def after_model(self, callback_context, llm_response):
+        if self.mode != "record" or llm_response.partial:
+            return None
+        pending = self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if pending is None:
+            return None
+        key, start = pending
+        seconds = time.perf_counter() - start
+        entry = {
+            "key": key,
+            "agent": callback_context.agent_name,
+            "seconds": round(seconds, 4),
+            "response": llm_response.model_dump(mode="json", exclude_none=True),
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._count(llm_response, seconds)
+        return None
+
+    def install(self, agents):
+        for agent in agents:
+            agent.before_model_callback = _chain(agent.before_model_callback, self.before_model)
+            agent.after_model_callback = _chain(agent.after_model_callback, self.after_model)
+        return self
+
+
+def _chain(existing, callback):
+    if existing is None:
+        return callback
+    if isinstance(existing, list):
+        return existing + [callback]
+    return [existing, callback]
+
+
+def install_from_env(agents):
+    """Attach a ModelRecorder to `agents` when LLM_REPLAY_MODE is set; returns it or None."""
+    if not REPLAY_MODE:
+        return None
+    return ModelRecorder(REPLAY_MODE).install(agents)
+
+
+def run_question_set(questions):
+    """POST each question to /chat and collect latency, tool-call and token counts.
+
+    Run with LLM_REPLAY_MODE=replay so the wall time is the pipeline's own
+    overhead (Flask, runner, sessions, tools) without the network.
+    """
+    import server
+    from my_agent.agent import recorder
+
+    client = server.app.test_client()
+    rows = []
+    for question in questions:
+        if recorder:
+            recorder.reset_stats()
+        start = time.perf_counter()
+        # A new session per question, so earlier answers never change the recorded prompts.
+        resp = client.post("/chat", json={"message": question, "session_id": f"replay-{uuid.uuid4()}"})
+        wall = time.perf_counter() - start
+        stats = recorder.reset_stats() if recorder else {}
+        rows.append({
+            "question": question,
+            "status": resp.status_code,
+            "wall_ms": round(wall * 1000, 2),
+            "model_calls": stats.get("model_calls", 0),
+            "tool_calls": stats.get("tool_calls", 0),
+            "prompt_tokens": stats.get("prompt_tokens", 0),
+            "output_tokens": stats.get("output_tokens", 0),
+            "recorded_model_ms": round(stats.get("model_seconds", 0.0) * 1000, 2),
+            "replay_misses": stats.get("replay_misses", 0),
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python -m my_agent.replay record|replay questions.txt [report.json]
+    if len(sys.argv) < 3 or sys.argv[1] not in ("record", "replay"):
+        sys.exit("usage: python -m my_agent.replay record|replay questions.txt [report.json]")
+    if REPLAY_MODE and REPLAY_MODE != sys.argv[1]:
+        sys.exit(f"LLM_REPLAY_MODE={REPLAY_MODE} conflicts with {sys.argv[1]!r}")
+    if REPLAY_MODE is None:
+        sys.exit(f"Set LLM_REPLAY_MODE={sys.argv[1]} so the agents are wired before import")
+
+    with open(sys.argv[2], "r", encoding="utf-8") as f:
+        questions = [line.strip() for line in f if line.strip()]
+
+    rows = run_question_set(questions)
+    for row in rows:
+        print(f"{row['wall_ms']:9.1f} ms  model {row['model_calls']}  tools {row['tool_calls']}  "
+              f"tokens {row['prompt_tokens']}/{row['output_tokens']}  misses {row['replay_misses']}  "
+              f"[{row['status']}] {row['question']}")
+    totals = {k: sum(r[k] for r in rows) for k in ("wall_ms", "model_calls", "tool_calls",
+                                                   "prompt_tokens", "output_tokens", "recorded_model_ms",
+                                                   "replay_misses")}
+    print(f"total {totals['wall_ms']:.1f} ms local, {totals['recorded_model_ms']:.1f} ms recorded model time, "
+          f"{totals['model_calls']} model calls, {totals['tool_calls']} tool calls, "
+          f"{totals['prompt_tokens']}/{totals['output_tokens']} tokens, {totals['replay_misses']} replay misses")
+
+    if len(sys.argv) > 3:
+        with open(sys.argv[3], "w", encoding="utf-8") as f:
+            json.dump({"mode": sys.argv[1], "questions": rows, "totals": totals}, f, indent=2)
+
+    failed = sum(1 for r in rows if r["status"] != 200)
+    if failed or totals["replay_misses"]:
+        sys.exit(f"❌ {failed} question(s) failed, {totals['replay_misses']} model call(s) had no recording; "
+                 "re-record the fixtures if prompts or FAQ data changed")
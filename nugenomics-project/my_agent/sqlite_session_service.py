@@ -0,0 +1,448 @@
+import os
+import json
+import time
+import uuid
+import queue
+import sqlite3
+import asyncio
+import threading
+from typing import Any, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session, State
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), "data", "sessions.db")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+FLUSH_INTERVAL = 0.05
+BATCH_SIZE = 256
+PURGE_INTERVAL = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    create_time REAL NOT NULL,
+    update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE INDEX IF NOT EXISTS sessions_by_update ON sessions (update_time);
+CREATE TABLE IF NOT EXISTS events (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (app_name, user_id, session_id, timestamp);
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+);
+"""
+
+
+def _split_state(state):
+    """Split a flat state dict into (session, app, user) parts, dropping temp: keys."""
+    session_state, app_state, user_state = {}, {}, {}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            app_state[key[len(State.APP_PREFIX):]] = value
+        elif key.startswith(State.USER_PREFIX):
+            user_state[key[len(State.USER_PREFIX):]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session_state[key] = value
+    return session_state, app_state, user_state
+
+
+def _merge_state(session_state, app_state, user_state):
+    merged = dict(session_state)
+    for key, value in app_state.items():
+        merged[State.APP_PREFIX + key] = value
+    for key, value in user_state.items():
+        merged[State.USER_PREFIX + key] = value
+    return merged
+
+
+class SqliteSessionService(BaseSessionService):
+    """Session service on a local SQLite file (WAL mode) shared by all workers on a host.
+
+    Event appends are queued and written by a background thread in batches, so
+    the agent loop never waits on disk. Any read, create or delete first waits
+    for this process's queue to drain, so a worker always sees its own writes.
+    Sessions untouched for longer than ``ttl_seconds`` are purged periodically.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE,
+                 purge_interval=PURGE_INTERVAL):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.purge_interval = purge_interval
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._write_error = None
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+        self._writer = threading.Thread(target=self._write_loop, name="sqlite-session-writer", daemon=True)
+        self._writer.start()
+
+    # -- connections -------------------------------------------------------
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -- background writer -------------------------------------------------
+
+    def _write_loop(self):
+        conn = self._connect()
+        last_purge = time.time()
+        while True:
+            try:
+                op = self._queue.get(timeout=self.purge_interval)
+            except queue.Empty:
+                op = None
+            if op is None and self._closed:
+                return
+
+            batch = [op] if op is not None else []
+            deadline = time.time() + self.flush_interval
+            while batch and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.time())))
+                except queue.Empty:
+                    break
+
+            ops = [o for o in batch if o is not None]
+            try:
+                if ops:
+                    conn.execute("BEGIN IMMEDIATE")
+                    for o in ops:
+                        self._apply_append(conn, *o)
+                    conn.execute("COMMIT")
+            except Exception as e:
+                # Keep the writer alive; the next _drain() re-raises for the caller.
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                print(f"❌ Dropped {len(ops)} session event(s): {e}")
+                self._write_error = e
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if time.time() - last_purge >= self.purge_interval:
+                try:
+                    self._purge(conn)
+                except Exception as e:
+                    print(f"❌ Session purge failed: {e}")
+                last_purge = time.time()
+            if self._closed and self._queue.empty():
+                return
+
+    def _apply_append(self, conn, app_name, user_id, session_id, event_id, timestamp,
+                      data, session_state, app_delta, user_delta):
+        conn.execute(
+            "INSERT INTO events (app_name, user_id, session_id, id, timestamp, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (app_name, user_id, session_id, event_id, timestamp, data),
+        )
+        conn.execute(
+            "UPDATE sessions SET state = ?, update_time = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+            (session_state, timestamp, app_name, user_id, session_id),
+        )
+        app_delta = json.loads(app_delta)
+        user_delta = json.loads(user_delta)
+        if app_delta:
+            state = self._read_state(conn, "SELECT state FROM app_states WHERE app_name = ?", (app_name,))
+            state.update(app_delta)
+            conn.execute("INSERT OR REPLACE INTO app_states (app_name, state) VALUES (?, ?)",
+                         (app_name, json.dumps(state)))
+        if user_delta:
+            state = self._read_state(conn, "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?",
+                                     (app_name, user_id))
+            state.update(user_delta)
+            conn.execute("INSERT OR REPLACE INTO user_states (app_name, user_id, state) VALUES (?, ?, ?)",
+                         (app_name, user_id, json.dumps(state)))
+
+    def _purge(self, conn):
+        if not self.ttl_seconds:
+            return 0
+        cutoff = time.time() - self.ttl_seconds
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM events WHERE (app_name, user_id, session_id) IN "
+                "(SELECT app_name, user_id, id FROM sessions WHERE update_time < ?)",
+                (cutoff,),
+            )
+            removed = conn.execute("DELETE FROM sessions WHERE update_time < ?", (cutoff,)).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def _drain(self):
+        """Block until every queued append from this process is on disk.
+
+        Raises if the writer thread has died or if a batch failed since the last
+        drain, instead of waiting forever or hiding the lost events.
+        """
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if not self._writer.is_alive():
+                    raise RuntimeError("SQLite session writer thread is not running")
+                self._queue.all_tasks_done.wait(timeout=1.0)
+        error, self._write_error = self._write_error, None
+        if error is not None:
+            raise RuntimeError(f"Writing session events failed: {error}") from error
+
+    async def _adrain(self):
+        await asyncio.to_thread(self._drain)
+
+    async def flush(self) -> None:
+        await self._adrain()
+
+    def purge_expired(self):
+        """Delete sessions (and their events) older than the TTL. Returns the number removed."""
+        self._drain()
+        return self._purge(self._connect())
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+    # -- helpers -----------------------------------------------------------
+
+    @staticmethod
+    def _read_state(conn, sql, params):
+        row = conn.execute(sql, params).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _shared_state(self, conn, app_name, user_id):
+        app_state = self._read_state(conn, "SELECT state FROM app_states WHERE app_name = ?", (app_name,))
+        user_state = self._read_state(conn, "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?",
+                                      (app_name, user_id))
+        return app_state, user_state
+
+    def _expired(self, update_time):
+        return bool(self.ttl_seconds) and update_time < time.time() - self.ttl_seconds
+
+    # -- BaseSessionService ------------------------------------------------
+
+    async def create_session(self, *, app_name: str, user_id: str,
+                             state: Optional[dict[str, Any]] = None,
+                             session_id: Optional[str] = None) -> Session:
+        await self._adrain()
+        conn = self._connect()
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        session_state, app_delta, user_delta = _split_state(state)
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # An expired session the purge has not reached yet must not block reuse of its id.
+            if self.ttl_seconds:
+                cutoff = now - self.ttl_seconds
+                expired = conn.execute(
+                    "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ? AND update_time < ?",
+                    (app_name, user_id, session_id, cutoff),
+                ).rowcount
+                if expired:
+                    conn.execute("DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                                 (app_name, user_id, session_id))
+            try:
+                conn.execute(
+                    "INSERT INTO sessions (app_name, user_id, id, state, create_time, update_time) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (app_name, user_id, session_id, json.dumps(session_state), now, now),
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Session with id {session_id} already exists.")
+            app_state, user_state = self._shared_state(conn, app_name, user_id)
+            if app_delta:
+                app_state.update(app_delta)
+                conn.execute("INSERT OR REPLACE INTO app_states (app_name, state) VALUES (?, ?)",
+                             (app_name, json.dumps(app_state)))
+            if user_delta:
+                user_state.update(user_delta)
+                conn.execute("INSERT OR REPLACE INTO user_states (app_name, user_id, state) VALUES (?, ?, ?)",
+                             (app_name, user_id, json.dumps(user_state)))
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        return Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=_merge_state(session_state, app_state, user_state),
+            last_update_time=now,
+        )
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                          config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        await self._adrain()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT state, update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+            (app_name, user_id, session_id),
+        ).fetchone()
+        if row is None or self._expired(row[1]):
+            return None
+
+        sql = "SELECT data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+        params = [app_name, user_id, session_id]
+        if config and config.after_timestamp:
+            sql += " AND timestamp >= ?"
+            params.append(config.after_timestamp)
+        sql += " ORDER BY timestamp DESC, rowid DESC"
+        if config and config.num_recent_events:
+            sql += " LIMIT ?"
+            params.append(config.num_recent_events)
+        rows = conn.execute(sql, params).fetchall()
+        events = [Event.model_validate_json(r[0]) for r in reversed(rows)]
+
+        app_state, user_state = self._shared_state(conn, app_name, user_id)
+        return Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=_merge_state(json.loads(row[0]), app_state, user_state),
+            events=events,
+            last_update_time=row[1],
+        )
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        await self._adrain()
+        conn = self._connect()
+        sql = "SELECT user_id, id, state, update_time FROM sessions WHERE app_name = ?"
+        params = [app_name]
+        if user_id is not None:
+            sql += " AND user_id = ?"
+            params.append(user_id)
+        rows = conn.execute(sql + " ORDER BY update_time", params).fetchall()
+
+        sessions = []
+        for owner, sid, state, update_time in rows:
+            if self._expired(update_time):
+                continue
+            app_state, user_state = self._shared_state(conn, app_name, owner)
+            sessions.append(Session(
+                id=sid,
+                app_name=app_name,
+                user_id=owner,
+                state=_merge_state(json.loads(state), app_state, user_state),
+                last_update_time=update_time,
+            ))
+        return ListSessionsResponse(sessions=sessions)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await self._adrain()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                         (app_name, user_id, session_id))
+            conn.execute("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                         (app_name, user_id, session_id))
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        # The base class returns a copy with the temp: delta trimmed; persist that one.
+        event = await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+
+        session_state, _, _ = _split_state(session.state)
+        app_delta, user_delta = {}, {}
+        if event.actions and event.actions.state_delta:
+            _, app_delta, user_delta = _split_state(event.actions.state_delta)
+
+        # Serialize here so an unencodable value raises in the caller, not the writer.
+        self._queue.put((
+            session.app_name,
+            session.user_id,
+            session.id,
+            event.id,
+            event.timestamp,
+            event.model_dump_json(exclude_none=True),
+            json.dumps(session_state),
+            json.dumps(app_delta),
+            json.dumps(user_delta),
+        ))
+        return event
+
+
+if __name__ == "__main__":
+    import asyncio
+    import tempfile
+    from google.adk.sessions.in_memory_session_service import InMemorySessionService
+    from google.genai import types
+
+    N_EVENTS = 5000
+
+    async def bench(name, service):
+        session = await service.create_session(app_name="bench", user_id="u", session_id="s")
+        start = time.perf_counter()
+        for i in range(N_EVENTS):
+            event = Event(
+                author="user",
+                invocation_id=f"inv-{i}",
+                content=types.Content(role="user", parts=[types.Part(text=f"message {i}")]),
+            )
+            await service.append_event(session, event)
+        append_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if hasattr(service, "flush"):
+            await service.flush()
+        flush_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loaded = await service.get_session(app_name="bench", user_id="u", session_id="s",
+                                           config=GetSessionConfig(num_recent_events=20))
+        read_ms = (time.perf_counter() - start) * 1000
+        print(f"{name:10s} append {N_EVENTS / append_s:10.0f} ev/s  "
+              f"flush {flush_s * 1000:7.1f} ms  last-20 read {read_ms:6.2f} ms  "
+              f"({len(loaded.events)} events)")
+
+    async def main():
+        await bench("in-memory", InMemorySessionService())
+        with tempfile.TemporaryDirectory() as tmp:
+            service = SqliteSessionService(db_path=os.path.join(tmp, "bench.db"))
+            await bench("sqlite", service)
+            service.close()
+
+    asyncio.run(main())
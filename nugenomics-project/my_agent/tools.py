@@ -1,13 +1,216 @@
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from html.parser import HTMLParser
+from threading import Lock
+
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+try:
+    from lxml import etree as _lxml_etree
+except ImportError:
+    _lxml_etree = None
+
+MAX_CHARS = 15000
+CHUNK_SIZE = 64 * 1024
+FRESH_SECONDS = 300
+MEMORY_CACHE_SIZE = 64
+HTTP_CACHE_DIR = os.path.join(os.path.dirname(__file__), "data", "http_cache")
+
+_SKIP_TAGS = {"script", "style", "template"}
+
+_session = requests.Session()
+_session.headers.update({"User-Agent": "nugenomics-faq-cache/1.0"})
+_session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+_session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+
+_cache_lock = Lock()
+_memory_cache = OrderedDict()
+
+
+class _TextCollector:
+    """Parser target that gathers stripped text nodes, like get_text("\\n", strip=True)."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.parts = []
+        self.size = 0
+        self._pending = []
+        self._skip = 0
+
+    def start(self, tag, attrib=None):
+        self._flush()
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+
+    def end(self, tag):
+        self._flush()
+        if tag in _SKIP_TAGS and self._skip:
+            self._skip -= 1
+
+    def data(self, text):
+        if not self._skip:
+            self._pending.append(text)
+
+    def close(self):
+        self._flush()
+        return self.text()
+
+    @property
+    def full(self):
+        return self.size >= self.budget
+
+    def text(self):
+        return "\n".join(self.parts)[:self.budget]
+
+    def _flush(self):
+        if self._pending:
+            s = "".join(self._pending).strip()
+            self._pending = []
+            if s:
+                self.parts.append(s)
+                self.size += len(s) + 1
+
+
+class _StdlibParser(HTMLParser):
+    """Feeds html.parser events into a _TextCollector."""
+
+    def __init__(self, target):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag)
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+def _make_parser(target):
+    # lxml is several times faster than html.parser; use it when it is installed.
+    if _lxml_etree is not None:
+        return _lxml_etree.HTMLParser(target=target)
+    return _StdlibParser(target)
+
+
+def _extract_text(chunks, budget=MAX_CHARS):
+    """Parse HTML chunk by chunk and stop as soon as `budget` characters of text are collected."""
+    collector = _TextCollector(budget)
+    parser = _make_parser(collector)
+    for chunk in chunks:
+        if chunk:
+            parser.feed(chunk)
+        if collector.full:
+            return collector.text()
+    parser.close()
+    return collector.close()
+
+
+def _cache_path(url):
+    return os.path.join(HTTP_CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+
+def _cache_get(url):
+    with _cache_lock:
+        entry = _memory_cache.get(url)
+        if entry is not None:
+            _memory_cache.move_to_end(url)
+            return entry
+    try:
+        with open(_cache_path(url), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    _cache_put(url, entry, persist=False)
+    return entry
+
+
+def _cache_put(url, entry, persist=True):
+    with _cache_lock:
+        _memory_cache[url] = entry
+        _memory_cache.move_to_end(url)
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+    if persist:
+        os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+        with open(_cache_path(url), "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+
 
 def retrieve_policy_document_content(url: str):
     """Fetch and clean webpage text for company policy or FAQ pages."""
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        text = soup.get_text(separator="\n", strip=True)
-        return text[:15000]
+        cached = _cache_get(url)
+        if cached and time.time() - cached.get("checked_at", 0) < FRESH_SECONDS:
+            return cached["text"]
+
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        with _session.get(url, headers=headers, timeout=10, stream=True) as response:
+            if response.status_code == 304 and cached:
+                cached["checked_at"] = time.time()
+                _cache_put(url, cached)
+                return cached["text"]
+            response.raise_for_status()
+            response.encoding = response.encoding or "utf-8"
+            text = _extract_text(response.iter_content(CHUNK_SIZE, decode_unicode=True))
+
+        _cache_put(url, {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "checked_at": time.time(),
+            "text": text,
+        })
+        return text
     except Exception as e:
         return f"Error fetching or processing the link: {e}"
+
+
+if __name__ == "__main__":
+    from bs4 import BeautifulSoup
+
+    def fixture(n_items):
+        item = ("<div class='faq'><h3>Question {i}: how is my DNA report generated?</h3>"
+                "<p>Your saliva sample is analysed &amp; combined with your lifestyle data {i}.</p>"
+                "<script>var x{i} = 1;</script></div>\n")
+        return "<html><body>" + "".join(item.format(i=i) for i in range(n_items)) + "</body></html>"
+
+    def chunked(html):
+        return (html[i:i + CHUNK_SIZE] for i in range(0, len(html), CHUNK_SIZE))
+
+    print(f"parser backend: {'lxml' if _lxml_etree is not None else 'html.parser'}")
+    for n_items in (1000, 20000, 100000):
+        html = fixture(n_items)
+
+        start = time.perf_counter()
+        full = BeautifulSoup(html, "html.parser").get_text(separator="\n", strip=True)[:MAX_CHARS]
+        full_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        partial = _extract_text(chunked(html))
+        partial_ms = (time.perf_counter() - start) * 1000
+
+        url = f"fixture://{n_items}"
+        _cache_put(url, {"url": url, "checked_at": time.time(), "text": partial}, persist=False)
+        start = time.perf_counter()
+        retrieve_policy_document_content(url)
+        cached_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{len(html) / 1e6:6.1f} MB  full parse {full_ms:9.1f} ms  "
+              f"partial parse {partial_ms:7.1f} ms  cached {cached_ms:6.3f} ms  "
+              f"same text: {full == partial}")
@@ -1,6 +1,8 @@
 import os
+import uuid
+import atexit
 import traceback
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, make_response
 from flask_cors import CORS
 from dotenv import load_dotenv
 import asyncio
@@ -11,6 +13,9 @@ from google.adk.sessions.in_memory_session_service import InMemorySessionService
 from google.genai import types
 
 from my_agent.agent import root_agent 
+from my_agent import profiling
+from my_agent.fanout import fanout_stats
+from my_agent.sqlite_session_service import SqliteSessionService, DEFAULT_DB_PATH, DEFAULT_TTL_SECONDS
 
 
 load_dotenv()
@@ -21,7 +26,17 @@ CORS(app)
 
 APP_NAME = "MultiAgentApp"
 USER_ID = "web_user"
-session_service = InMemorySessionService()
+SESSION_COOKIE = "session_id"
+
+if os.getenv("SESSION_BACKEND", "sqlite") == "memory":
+    session_service = InMemorySessionService()
+else:
+    session_service = SqliteSessionService(
+        db_path=os.getenv("SESSION_DB_PATH", DEFAULT_DB_PATH),
+        ttl_seconds=int(os.getenv("SESSION_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+    )
+    # The writer is a daemon thread; write out queued events before exiting.
+    atexit.register(session_service.close)
 
 runner = Runner(
     agent=root_agent,
@@ -34,7 +49,37 @@ def home():
     return render_template("index.html")
 
 @app.route("/chat", methods=["POST"])
-def chat(): 
+def chat():
+    if not profiling.should_profile(request.headers):
+        return _chat()
+
+    with profiling.profile_request("chat") as prof:
+        response = make_response(_chat())
+    response.headers["X-Profile-Output"] = os.path.basename(prof["path"])
+    return response
+
+
+@app.route("/admin/profiling", methods=["GET", "POST"])
+def admin_profiling():
+    if not profiling.is_admin(request.headers):
+        return jsonify({"error": "forbidden"}), 403
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        try:
+            profiling.set_sample_rate(data.get("sample_rate", 0))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    return jsonify(profiling.status())
+
+
+@app.route("/admin/fanout", methods=["GET"])
+def admin_fanout():
+    if not profiling.is_admin(request.headers):
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify(fanout_stats())
+
+
+def _chat(): 
     try:
         data = request.get_json()
         query = data.get("message", "").strip()
@@ -42,12 +87,15 @@ def chat():
         if not query:
             return jsonify({"reply": "Please enter a valid question."}), 400
 
-        session_id = "main_session"
+        # One session per browser (cookie) or per caller-supplied id, so history
+        # survives restarts and workers never touch each other's sessions.
+        session_id = str(data.get("session_id") or request.cookies.get(SESSION_COOKIE) or uuid.uuid4())[:128]
 
         async def get_response():
 
-            await session_service.delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
-            await session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+            session = await session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+            if session is None:
+                await session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
 
             full_response = ""
 
@@ -69,7 +117,10 @@ def chat():
             return full_response if full_response else "No response received."
 
         response = asyncio.run(get_response())
-        return jsonify({"reply": response})
+        resp = jsonify({"reply": response, "session_id": session_id})
+        resp.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="Lax",
+                        max_age=int(os.getenv("SESSION_TTL_SECONDS", DEFAULT_TTL_SECONDS)))
+        return resp
 
     except Exception as e:
         traceback.print_exc()
@@ -0,0 +1,46 @@
+import os
+import sys
+import json
+import shutil
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path):
+    """Serve a copy of fixtures/site on a local port; yields (root dir, base URL)."""
+    root = tmp_path / "site"
+    shutil.copytree(os.path.join(FIXTURES, "site"), root)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=str(root)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield root, f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def faq_index(tmp_path, monkeypatch):
+    """Point faq_service at an empty cache file so tests never touch the real one."""
+    from my_agent import faq_service
+    from my_agent.faq_store import FaqStore
+
+    cache = tmp_path / "faqs_cache.txt"
+    cache.write_text(json.dumps([]), encoding="utf-8")
+    monkeypatch.setattr(faq_service, "CACHE_PATH", str(cache))
+    monkeypatch.setattr(faq_service, "_index", FaqStore())
+    return faq_service
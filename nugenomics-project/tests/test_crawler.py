@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from my_agent import crawler
+
+
+def _write_sitemap(root, base, pages):
+    locs = "".join(f"<url><loc>{base}/{page}</loc></url>" for page in pages)
+    (root / "sitemap.xml").write_text(
+        '<?xml version="1.0"?>'
+        f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</urlset>',
+        encoding="utf-8",
+    )
+
+
+@pytest.fixture
+def crawl(site, faq_index, tmp_path):
+    root, base = site
+    _write_sitemap(root, base, ["report.html", "counselling.html"])
+    manifest = tmp_path / "manifest.json"
+
+    def run(urls=None):
+        return crawler.crawl_and_reindex(
+            urls if urls is not None else [f"{base}/saliva.html"],
+            f"{base}/sitemap.xml",
+            manifest_path=str(manifest),
+            per_host_delay=0,
+        )
+
+    return root, base, manifest, run
+
+
+def _questions(faq_service):
+    return sorted(item["question"] for item in faq_service._index)
+
+
+def test_first_crawl_indexes_every_page(crawl, faq_index):
+    root, base, _, run = crawl
+    summary = run()
+    assert summary["changed"] == sorted(f"{base}/{p}" for p in ("saliva.html", "report.html", "counselling.html"))
+    assert summary["entries"] == 3
+    assert "How do I collect my saliva sample?" in _questions(faq_index)
+
+
+def test_second_crawl_reindexes_nothing(crawl, faq_index):
+    _, _, _, run = crawl
+    run()
+    summary = run()
+    assert summary["changed"] == []
+    assert summary["removed"] == []
+    assert summary["entries"] == 3
+
+
+def test_only_changed_page_is_reindexed(crawl, faq_index):
+    root, base, _, run = crawl
+    run()
+    page = root / "report.html"
+    page.write_text(page.read_text(encoding="utf-8").replace("72 hours", "48 hours"), encoding="utf-8")
+
+    summary = run()
+    assert summary["changed"] == [f"{base}/report.html"]
+    answers = [item["answer"] for item in faq_index._index if item["url"] == f"{base}/report.html"]
+    assert answers == ["Your blood report will be ready in 48 hours."]
+
+
+def test_missing_and_dropped_pages_are_removed(crawl, faq_index):
+    root, base, _, run = crawl
+    run()
+    (root / "counselling.html").unlink()
+    summary = run(urls=[])
+    assert summary["removed"] == sorted([f"{base}/counselling.html", f"{base}/saliva.html"])
+    assert _questions(faq_index) == ["When will I get my Blood report?"]
+
+
+def test_manifest_not_saved_when_reindex_fails(crawl, faq_index, monkeypatch):
+    _, _, manifest, run = crawl
+    reindex_pages = crawler.reindex_pages
+
+    def fail(pages, removed=()):
+        raise RuntimeError("cache write failed")
+
+    monkeypatch.setattr(crawler, "reindex_pages", fail)
+    with pytest.raises(RuntimeError):
+        run()
+    assert not manifest.exists()
+
+    monkeypatch.setattr(crawler, "reindex_pages", reindex_pages)
+    summary = run()
+    assert len(summary["changed"]) == 3
+    assert len(json.loads(manifest.read_text(encoding="utf-8"))) == 3
@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+from my_agent import faq_service
+from my_agent.faq_store import FaqStore
+
+FIXTURE_CACHE = os.path.join(os.path.dirname(__file__), "fixtures", "faqs_cache.json")
+
+# MIN_SCORE was calibrated on these two sets.
+# (misspelled query, question it should retrieve)
+MISSPELLED_QUERIES = [
+    ("who is the progam for", "Who is the program for?"),
+    ("how dose it wrok", "And how does it work?"),
+    ("will you tell me what to eet", "Will you be telling me what to eat & what not to?"),
+    ("do i need a gym membrship", "Am I going to need to go get a gym membership?"),
+    ("blod parameters in sampel testing", "What are the blood parameters you consider in the sample testing?"),
+    ("genetc parametres", "What are the genetic parameters you consider during sample testing?"),
+    ("how long dose the progam last", "How long does this program usually last?"),
+    ("subscripton options after 3 months", "After these initial 3-months, what are your subscription options?"),
+    ("do you have emi optons", "Do I have to pay all at once or do you have EMIs?"),
+    ("data securty norms", "Are you up to date with data & information security norms?"),
+    ("medical diagnostc info in results", "Will my results indicate any medical or diagnostic info?"),
+    ("get rid of my sampel", "Once we’re done, I’d like you to get rid of my sample. Would that be possible?"),
+    ("reschedule genetic counseling sesion", "Can I reschedule my Genetic Counselling session ?"),
+    ("reschedle sample colection", "Can I reschedule my sample collection ?"),
+    ("what is a wellbieng and transformation sesion", "What is a wellbeing and transformation session?"),
+    ("wen will i get my blod reprot", "When will I get my Blood report?"),
+]
+# Out-of-scope queries that should return nothing, so search_faq_text can
+# answer "not found in our FAQ".
+NO_ANSWER_QUERIES = [
+    "refund", "refund policy", "what is the capital of france", "do you ship to canada",
+    "cancel my order", "weather today", "bitcoin price", "job openings", "hello",
+    "tell me a joke", "how to bake bread", "best football team", "car insurance quote",
+    "covid vaccine slots", "password reset",
+]
+
+# Held out: MIN_SCORE was not fit on these.
+HELD_OUT_QUERIES = [
+    ("saliva smaple", "How do I collect my saliva sample?"),
+    ("nugenomic kit", "What comes in the NuGenomics kit?"),
+    ("how do i colect saliva", "How do I collect my saliva sample?"),
+    ("whats in the nugenomics kti", "What comes in the NuGenomics kit?"),
+    ("how long is the programe", "How long does this program usually last?"),
+    ("resechdule lifestyle analysis sesion", "Can I reschedule my Lifestyle Analysis session ?"),
+    ("when is my blod report ready", "When will I get my Blood report?"),
+    ("can i pay in emis", "Do I have to pay all at once or do you have EMIs?"),
+    ("is my personal infomation safe", "What about me personal information from your systems?"),
+    ("what fitnes level do i need", "What degree of fitness do you expect from me?"),
+]
+HELD_OUT_NO_ANSWER = [
+    "shipping cost", "return policy", "store opening hours", "translate this to spanish",
+    "stock market news", "who won the match",
+]
+
+
+@pytest.fixture(autouse=True)
+def fixture_cache(monkeypatch):
+    """Search a fixed copy of the FAQ cache, not whatever was last crawled."""
+    monkeypatch.setattr(faq_service, "CACHE_PATH", FIXTURE_CACHE)
+    monkeypatch.setattr(faq_service, "_index", FaqStore())
+
+
+def full_scan(q):
+    # The original matcher: SequenceMatcher over every entry, threshold 0.20.
+    scored = []
+    for item in faq_service._load_index():
+        text = faq_service._search_text(item)
+        score = faq_service._similar(q, text)
+        if score >= 0.20 or q.lower() in text:
+            scored.append((score, item))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [item["question"] for _, item in scored[:faq_service.TOP_K]]
+
+
+def indexed(q):
+    return [r["question"] for r in faq_service.query_faq(q)["results"]]
+
+
+def _recall(search, queries):
+    return sum(expected in search(q) for q, expected in queries)
+
+
+def _empty(search, queries):
+    return sum(not search(q) for q in queries)
+
+
+@pytest.mark.parametrize("queries", [MISSPELLED_QUERIES, HELD_OUT_QUERIES], ids=["calibration", "held-out"])
+def test_recall_at_least_full_scan(queries):
+    assert _recall(indexed, queries) >= _recall(full_scan, queries)
+
+
+def test_held_out_recall():
+    missed = [q for q, expected in HELD_OUT_QUERIES if expected not in indexed(q)]
+    assert missed == []
+
+
+@pytest.mark.parametrize("queries", [NO_ANSWER_QUERIES, HELD_OUT_NO_ANSWER], ids=["calibration", "held-out"])
+def test_out_of_scope_queries_return_nothing(queries):
+    assert _empty(indexed, queries) >= _empty(full_scan, queries)
+    assert [q for q in queries if indexed(q)] == []
+
+
+def test_exact_substring_always_matches():
+    assert "When will I get my Blood report?" in indexed("blood report")
@@ -0,0 +1,170 @@
+import time
+import asyncio
+import sqlite3
+
+import pytest
+from google.adk.events import Event, EventActions
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.genai import types
+
+from my_agent.sqlite_session_service import SqliteSessionService
+
+APP = "test_app"
+USER = "u1"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "sessions.db")
+
+
+@pytest.fixture
+def service(db_path):
+    service = SqliteSessionService(db_path=db_path, ttl_seconds=3600, flush_interval=0.01)
+    yield service
+    service.close()
+
+
+def _event(text, timestamp=None, state_delta=None):
+    event = Event(
+        author="user",
+        invocation_id="inv",
+        content=types.Content(role="user", parts=[types.Part(text=text)]),
+        actions=EventActions(state_delta=state_delta or {}),
+    )
+    if timestamp is not None:
+        event.timestamp = timestamp
+    return event
+
+
+def _texts(session):
+    return [e.content.parts[0].text for e in session.events]
+
+
+def _age(db_path, session_id, seconds):
+    # Backdate a session as if it had not been touched for `seconds`.
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE sessions SET update_time = update_time - ? WHERE id = ?", (seconds, session_id))
+    conn.close()
+
+
+def test_create_append_and_get(service):
+    async def run():
+        session = await service.create_session(app_name=APP, user_id=USER, session_id="s1", state={"k": 1})
+        for i in range(3):
+            await service.append_event(session, _event(f"message {i}"))
+        return await service.get_session(app_name=APP, user_id=USER, session_id="s1")
+
+    loaded = asyncio.run(run())
+    assert _texts(loaded) == ["message 0", "message 1", "message 2"]
+    assert loaded.state == {"k": 1}
+
+
+def test_create_existing_session_fails(service):
+    async def run():
+        await service.create_session(app_name=APP, user_id=USER, session_id="s1")
+        await service.create_session(app_name=APP, user_id=USER, session_id="s1")
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+
+
+def test_recent_events_keep_append_order_on_equal_timestamps(service):
+    async def run():
+        session = await service.create_session(app_name=APP, user_id=USER, session_id="s1")
+        now = time.time()
+        for i in range(6):
+            await service.append_event(session, _event(f"message {i}", timestamp=now))
+        return await service.get_session(app_name=APP, user_id=USER, session_id="s1",
+                                         config=GetSessionConfig(num_recent_events=3))
+
+    assert _texts(asyncio.run(run())) == ["message 3", "message 4", "message 5"]
+
+
+def test_expired_session_is_hidden_and_can_be_recreated(service, db_path):
+    async def create_and_append():
+        session = await service.create_session(app_name=APP, user_id=USER, session_id="s1", state={"k": 1})
+        await service.append_event(session, _event("old message"))
+        await service.flush()
+
+    async def reuse():
+        assert await service.get_session(app_name=APP, user_id=USER, session_id="s1") is None
+        await service.create_session(app_name=APP, user_id=USER, session_id="s1")
+        return await service.get_session(app_name=APP, user_id=USER, session_id="s1")
+
+    asyncio.run(create_and_append())
+    _age(db_path, "s1", 7200)
+    recreated = asyncio.run(reuse())
+    assert recreated.events == []
+    assert recreated.state == {}
+
+
+def test_purge_removes_expired_sessions(service, db_path):
+    async def run():
+        for sid in ("old", "new"):
+            session = await service.create_session(app_name=APP, user_id=USER, session_id=sid)
+            await service.append_event(session, _event(sid))
+        await service.flush()
+
+    asyncio.run(run())
+    _age(db_path, "old", 7200)
+    assert service.purge_expired() == 1
+    listed = asyncio.run(service.list_sessions(app_name=APP, user_id=USER))
+    assert [s.id for s in listed.sessions] == ["new"]
+
+
+def test_writer_error_is_raised_and_writer_survives(service, monkeypatch):
+    apply_append = service._apply_append
+
+    def fail(*args):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    async def append(text):
+        session = await service.get_session(app_name=APP, user_id=USER, session_id="s1")
+        await service.append_event(session, _event(text))
+        await service.flush()
+
+    asyncio.run(service.create_session(app_name=APP, user_id=USER, session_id="s1"))
+    monkeypatch.setattr(service, "_apply_append", fail)
+    with pytest.raises(RuntimeError, match="disk I/O error"):
+        asyncio.run(append("lost"))
+
+    monkeypatch.setattr(service, "_apply_append", apply_append)
+    asyncio.run(append("kept"))
+    loaded = asyncio.run(service.get_session(app_name=APP, user_id=USER, session_id="s1"))
+    assert _texts(loaded) == ["kept"]
+
+
+def test_app_user_and_temp_state(service):
+    async def run():
+        session = await service.create_session(app_name=APP, user_id=USER, session_id="s1")
+        await service.append_event(session, _event("hi", state_delta={
+            "k": "session", "app:theme": "dark", "user:name": "Asha", "temp:scratch": "x",
+        }))
+        await service.create_session(app_name=APP, user_id=USER, session_id="s2")
+        await service.create_session(app_name=APP, user_id="u2", session_id="s3")
+        return [await service.get_session(app_name=APP, user_id=user, session_id=sid)
+                for user, sid in ((USER, "s1"), (USER, "s2"), ("u2", "s3"))]
+
+    same, other_session, other_user = asyncio.run(run())
+    assert same.state == {"k": "session", "app:theme": "dark", "user:name": "Asha"}
+    assert "temp:scratch" not in same.events[0].actions.state_delta
+    assert other_session.state == {"app:theme": "dark", "user:name": "Asha"}
+    assert other_user.state == {"app:theme": "dark"}
+
+
+def test_events_survive_restart(db_path):
+    async def write():
+        service = SqliteSessionService(db_path=db_path)
+        session = await service.create_session(app_name=APP, user_id=USER, session_id="s1")
+        await service.append_event(session, _event("persisted"))
+        service.close()
+
+    asyncio.run(write())
+    service = SqliteSessionService(db_path=db_path)
+    try:
+        loaded = asyncio.run(service.get_session(app_name=APP, user_id=USER, session_id="s1"))
+    finally:
+        service.close()
+    assert _texts(loaded) == ["persisted"]